@@ -1,177 +1,237 @@
-# Ensure xlsxwriter is installed
-try:
-    import xlsxwriter
-except ImportError:
-    import sys
-    sys.exit("❌ Missing dependency: xlsxwriter. Install it using 'pip install xlsxwriter'.")
-
 # Imports
 import streamlit as st
 import numpy as np
 import pandas as pd
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-
-# ✅ Set page config at the very top
-st.set_page_config(page_title="Data Sweeper", layout="wide")
-
-# ✅ Custom CSS for Styling
-st.markdown("""
-    <style>
-        /* Background color */
-        .stApp {
-            background-color: #243447;
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# ✅ Limits and sizes
+PREVIEW_ROWS = 1000
+CHART_MAX_ROWS = 500
+MAX_PARSE_WORKERS = 8
+POLARS_INFER_ROWS = 100
+
+
+# ✅ File readers (polars is optional; fall back to pandas when missing)
+def _as_stream(buf):
+    # Readers get a file object over the upload's memoryview (file.getbuffer())
+    # so the bytes are not copied. pyarrow is required: every reader returns
+    # Arrow-backed dtypes.
+    import pyarrow as pa
+    return pa.BufferReader(buf)
+
+
+def _pd_read_csv(buf, nrows=None):
+    if nrows is not None:
+        return pd.read_csv(_as_stream(buf), nrows=nrows, dtype_backend='pyarrow')
+    return pd.read_csv(_as_stream(buf), engine='pyarrow', dtype_backend='pyarrow')
+
+
+def _read_csv(buf, nrows=None):
+    try:
+        import polars as pl
+    except ImportError:
+        return _pd_read_csv(buf, nrows)
+
+    # polars guesses types from the first rows only. A later row that does not
+    # fit raises, and a column that is empty there comes back as String; in
+    # either case scan every row for the types.
+    try:
+        df = pl.read_csv(_as_stream(buf), n_rows=nrows)
+    except pl.exceptions.ComputeError:
+        df = None
+    if df is None or _typed_from_nulls(df):
+        df = pl.read_csv(_as_stream(buf), n_rows=nrows, infer_schema_length=None)
+    return df.to_pandas(use_pyarrow_extension_array=True)
+
+
+def _typed_from_nulls(df):
+    import polars as pl
+    head = df.head(POLARS_INFER_ROWS)
+    return head.height > 0 and any(
+        dtype == pl.String and head[col].null_count() == head.height
+        for col, dtype in df.schema.items()
+    )
+
+
+def _read_excel(buf, nrows=None):
+    try:
+        import polars as pl
+        read_options = {"n_rows": nrows} if nrows is not None else None
+        return pl.read_excel(BytesIO(buf), engine="calamine", read_options=read_options).to_pandas(use_pyarrow_extension_array=True)
+    except ImportError:
+        pass
+
+    # pandas: prefer the Rust calamine reader, openpyxl as a last resort
+    try:
+        return pd.read_excel(BytesIO(buf), engine="calamine", nrows=nrows, dtype_backend='pyarrow')
+    except ImportError:
+        return pd.read_excel(BytesIO(buf), engine="openpyxl", nrows=nrows, dtype_backend='pyarrow')
+
+
+# ✅ File writers (pyarrow is required; polars is optional)
+def _write_csv(df, buffer):
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buffer)
+
+
+# xlsxwriter is only needed for Excel exports, so it is imported on first use
+def _get_xlsxwriter():
+    try:
+        import xlsxwriter
+    except ImportError:
+        st.error("❌ Missing dependency: xlsxwriter. Install it using 'pip install xlsxwriter'.")
+        st.stop()
+    return xlsxwriter
+
+
+def _write_excel(df, buffer):
+    _get_xlsxwriter()
+    try:
+        import polars as pl
+    except ImportError:
+        with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+            df.to_excel(writer, index=False)
+        return
+    # Plain numbers and no autofilter, as the pandas export wrote them
+    numeric = (pl.Int8, pl.Int16, pl.Int32, pl.Int64, pl.UInt8, pl.UInt16,
+               pl.UInt32, pl.UInt64, pl.Float32, pl.Float64)
+    pl.from_pandas(df).write_excel(buffer, autofit=False, autofilter=False, dtype_formats={numeric: "General"})
+
+
+def _write_parquet(df, buffer):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), buffer, compression="zstd")
+
+
+# ✅ Cleaning helpers
+def _drop_duplicates(df):
+    try:
+        import polars as pl
+    except ImportError:
+        return df.drop_duplicates()
+    return pl.from_pandas(df).unique(maintain_order=True).to_pandas(use_pyarrow_extension_array=True)
+
+
+def _fill_missing(df, numeric_cols):
+    block = df[numeric_cols].to_numpy(dtype="float64", na_value=np.nan)
+    missing = np.isnan(block)
+    if not missing.any():
+        return False
+
+    # Column means in one vectorized pass; all-NaN columns stay NaN
+    counts = block.shape[0] - missing.sum(axis=0)
+    means = np.divide(np.nansum(block, axis=0), counts,
+                      out=np.full(block.shape[1], np.nan), where=counts > 0)
+
+    # Filled columns are written back Arrow-backed, like the rest of the frame
+    import pyarrow as pa
+    filled = False
+    for i, col in enumerate(numeric_cols):
+        if missing[:, i].any() and counts[i] > 0:
+            arr = block[:, i].copy()
+            np.copyto(arr, means[i], where=missing[:, i])
+            df[col] = pd.array(arr, dtype=pd.ArrowDtype(pa.float64()))
+            filled = True
+    return filled
+
+
+# Working frames live in one reserved session dict keyed by upload file_id,
+# each entry holding the frame and its derived numeric column list
+def _working():
+    return st.session_state.setdefault("_working", {})
+
+
+# Numeric columns come from the whole working frame, not the column selection
+def _numeric_columns(file):
+    entry = _working()[file.file_id]
+    if "numcols" not in entry:
+        entry["numcols"] = entry["df"].select_dtypes(include=np.number).columns.tolist()
+    return entry["numcols"]
+
+
+def _set_working_df(file, df):
+    _working()[file.file_id] = {"df": df}
+    return df
+
+
+def _select_columns(df, columns):
+    columns = list(columns)
+    if columns == list(df.columns):
+        return df
+    return df.loc[:, columns]
+
+
+# ✅ Full reads are kept in session state by _load_full, so only previews are
+# cached; the upload's file_id is the key, so the buffer itself is never hashed
+def load_df(buf, ext):
+    if ext == ".csv":
+        return _read_csv(buf)
+    return _read_excel(buf)
+
+
+@st.cache_data(show_spinner=False, max_entries=32, ttl=3600)
+def load_preview(name, file_id, ext, _buf):
+    if ext == ".csv":
+        return _read_csv(_buf, nrows=PREVIEW_ROWS)
+    return _read_excel(_buf, nrows=PREVIEW_ROWS)
+
+
+# ✅ Previews of several uploads are parsed in parallel; the C/Rust readers
+# release the GIL while parsing
+def _parse_previews(files, file_meta):
+    ctx = get_script_run_ctx()
+
+    def _attach_ctx():
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+    with ThreadPoolExecutor(max_workers=min(MAX_PARSE_WORKERS, len(files)), initializer=_attach_ctx) as executor:
+        return {
+            f.name: executor.submit(load_preview, f.name, f.file_id, file_meta[f.name]["ext"], f.getbuffer())
+            for f in files
+            if file_meta[f.name]["ext"] in (".csv", ".xlsx")
         }
 
-        /* Top navigation bar color */
-        header[data-testid="stHeader"] {
-            background-color: #1F3647; 
-        }
 
-        /* Title styling */
-        h1 {
-            color:rgb(208, 208, 160);
-            text-align: left;
-            font-size: 9rem;
-        }
+# ✅ The full file is only parsed once the user acts on it, then kept in
+# session state so cleaning steps persist across reruns. Read errors are
+# reported like preview errors and give None.
+def _load_full(file, file_ext):
+    if file.file_id in _working():
+        return _working()[file.file_id]["df"]
 
-        /* File uploader box */
-        .stFileUploader {
-            border: 2px dashed: rgb(222, 224, 225);
-            border-radius: 10px;
-            padding: 10px;
-            background-color:rgb(82, 99, 110);
-        }
+    try:
+        return _set_working_df(file, load_df(file.getbuffer(), file_ext))
+    except Exception as e:
+        st.error(f"⚠️ Error reading {file.name}: {e}")
+        return None
 
-        /* Buttons */
-        .stButton>button {
-            background-color:rgb(61, 82, 130);
-            color: white;
-            border-radius: 10px;
-            padding: 10px 20px;
-            font-weight: bold;
-            border: none;
-        }
-        .stButton>button:hover {
-            background-color: #2980b9;
-            color: black;
-        }
 
-        /* DataFrame Preview */
-        .stDataFrame {
-            border: 1px solid #bdc3c7;
-            border-radius: 10px;
-            padding: 5px;
-            background-color: #ffffff;
-        }
+# ✅ Working frames are keyed by upload, so those of removed or replaced
+# uploads are dropped from the session
+def _drop_removed_uploads(files):
+    working = _working()
+    for file_id in set(working) - {f.file_id for f in files}:
+        del working[file_id]
 
-        /* Expander */
-        .streamlit-expanderHeader {
-            font-weight: bold;
-            color: #2c3e50;
-            font-size: 1.2rem;
-        }
 
-        /* Success message */
-        .stAlert {
-            background-color:rgb(61, 82, 130);
-            color: white;
-            border-radius: 10px;
-        }
+# ✅ Set page config at the very top
+st.set_page_config(page_title="Data Sweeper", layout="wide")
 
-        /* Download Button */
-        .stDownloadButton>button {
-            background-color:rgb(61, 82, 130);
-            color: white;
-            border-radius: 10px;
-            padding: 10px 20px;
-            border: none;
-        }
-        .stDownloadButton>button:hover {
-            background-color: #2980b9;
-        }
+# ✅ Custom CSS for Styling
+@st.cache_resource
+def _css():
+    css_path = os.path.join(os.path.dirname(__file__), "static", "app.css")
+    with open(css_path, encoding="utf-8") as css_file:
+        return f"<style>{css_file.read()}</style>"
 
 
-        @media (prefers-color-scheme: light) {
-            /* background color */
-            .stApp {
-                background-color: #edede9;
-            }
-
-            /* Top navigation bar color */
-            header[data-testid="stHeader"] {
-                background-color: #edede9; 
-            }
-
-            /* Title styling */
-            h1 {
-                color: #344e41;
-                text-align: left;
-                font-size: 9rem;
-            }
-
-            /* File uploader box */
-            .stFileUploader {
-                border: 2px dashed: #d6ccc2;
-                border-radius: 10px;
-                padding: 10px;
-                background-color: #d6ccc2;
-            }
-
-            /* Buttons */
-            .stButton>button {
-                background-color: #CEB5A1;
-                color: black;
-                border-radius: 10px;
-                padding: 10px 20px;
-                font-weight: bold;
-                border: none;
-            }
-
-            .stButton>button:hover {
-                background-color: #D6CCC2;
-                color: black;
-            }
-
-            /* DataFrame Preview */
-            .stDataFrame {
-                border: 1px solid #;
-                border-radius: 10px;
-                padding: 5px;
-                background-color: #E3E3DD;
-            }
-
-            /* Expander */
-            .streamlit-expanderHeader {
-                font-weight: bold;
-                color: #D5BDAF;
-                font-size: 1.2rem;
-            }
-
-            /* Success message */
-            .stAlert {
-                background-color:rgba(244, 243, 238, 0.72);
-                text-color: white;
-                border-radius: 10px;
-            }
-
-            /* Download Button */
-            .stDownloadButton>button {
-                background-color: #CEB5A1;
-                color: black;
-                border-radius: 10px;
-                padding: 10px 20px;
-                border: none;
-            }
-
-            .stDownloadButton>button:hover {
-                background-color: #D6CCC2;
-                text-color: black;
-            }
-}
-
-    </style>
-""", unsafe_allow_html=True)
+st.markdown(_css(), unsafe_allow_html=True)
 
 # App title and description
 st.title("Data Sweeper")
@@ -179,17 +239,30 @@ st.subheader("This is a simple tool to help you clean your data. Upload your dat
 
 # File uploader
 uploaded_files = st.file_uploader("Upload your files (CSV or Excel):", type=["csv", "xlsx"], accept_multiple_files=True)
+_drop_removed_uploads(uploaded_files or [])
 
 if uploaded_files:
+    # Extension and download names per file, derived once per run
+    file_meta = {}
+    for f in uploaded_files:
+        stem, ext = os.path.splitext(f.name)
+        file_meta[f.name] = {
+            "ext": ext.lower(),
+            "csv_name": stem + ".csv",
+            "xlsx_name": stem + ".xlsx",
+            "parquet_name": stem + ".parquet",
+        }
+
+    previews = _parse_previews(uploaded_files, file_meta)
+
     for file in uploaded_files:
-        file_ext = os.path.splitext(file.name)[-1].lower()
+        meta = file_meta[file.name]
+        file_ext = meta["ext"]
 
         # File reading with error handling
         try:
-            if file_ext == ".csv":
-                df = pd.read_csv(file)
-            elif file_ext == ".xlsx":
-                df = pd.read_excel(file)
+            if file_ext in (".csv", ".xlsx"):
+                preview_df = previews[file.name].result()
             else:
                 st.error(f"❌ Please upload a valid CSV or Excel file.")
                 continue
@@ -201,9 +274,14 @@ if uploaded_files:
         st.write(f"**File Name:** {file.name}")
         st.write(f"**File Size:** {file.getbuffer().nbytes / 1024:.2f} KB")
 
-        # Show data preview
+        # Work on the preview until the full file has been requested
+        entry = _working().get(file.file_id)
+        df = entry["df"] if entry else preview_df
+
+        # Show data preview; filled in after the options below so it includes
+        # cleaning done in this run
         st.write("Preview of the data:")
-        st.dataframe(df.head())
+        preview_slot = st.empty()
 
         # Expander for Data Cleaning & Processing Options
         with st.expander(f"Options for {file.name}"):
@@ -211,53 +289,77 @@ if uploaded_files:
 
             # Remove Duplicates
             if st.button(f"Remove Duplicates from {file.name}"):
-                df.drop_duplicates(inplace=True)
-                st.write("✅ Duplicates removed successfully.")
+                full_df = _load_full(file, file_ext)
+                if full_df is not None:
+                    df = _set_working_df(file, _drop_duplicates(full_df))
+                    st.write("✅ Duplicates removed successfully.")
 
             # Fill Missing Values
             if st.button(f"Fill Missing Values for {file.name}"):
-                numeric_cols = df.select_dtypes(include=[np.number]).columns
-                df[numeric_cols] = df[numeric_cols].fillna(df[numeric_cols].mean())
-                st.write("✅ Missing values filled successfully.")
+                full_df = _load_full(file, file_ext)
+                if full_df is not None:
+                    df = full_df
+                    if _fill_missing(df, _numeric_columns(file)):
+                        st.write("✅ Missing values filled successfully.")
+                    else:
+                        st.info("ℹ️ No missing numeric values to fill.")
 
             # Column Selection
             st.subheader("📌 Select Columns to Keep")
             columns = st.multiselect(f"Select columns for {file.name}", df.columns, default=df.columns)
-            df = df[columns]
+            df = _select_columns(df, columns)
 
             # Data Visualization
             st.subheader("📊 Data Visualization")
             if st.checkbox(f"Show Data Visualization for {file.name}"):
-                numeric_data = df.select_dtypes(include=['number']).dropna()
-                if numeric_data.shape[1] >= 1:
-                    st.bar_chart(numeric_data)
-                else:
-                    st.write("⚠️ No valid numeric data available for visualization.")
+                full_df = _load_full(file, file_ext)
+                if full_df is not None:
+                    df = _select_columns(full_df, columns)
+                    selected = set(columns)
+                    numeric_data = df[[col for col in _numeric_columns(file) if col in selected]].dropna()
+                    if numeric_data.shape[1] >= 1:
+                        # Only send a bounded number of rows to the browser
+                        step = max(1, -(-len(numeric_data) // CHART_MAX_ROWS))
+                        st.bar_chart(numeric_data.iloc[::step])
+                    else:
+                        st.write("⚠️ No valid numeric data available for visualization.")
 
             # Conversion Options
             st.subheader("🔄 Conversion Options")
-            conversion_type = st.radio(f"Convert {file.name} to:", ["CSV", "Excel"], key=file.name)
+            conversion_type = st.radio(f"Convert {file.name} to:", ["CSV", "Excel", "Parquet"], key=file.name)
 
             if st.button(f"Convert {file.name}"):
-                buffer = BytesIO()
-                if conversion_type == "CSV":
-                    df.to_csv(buffer, index=False)
-                    file_name = file.name.replace(file_ext, ".csv")
-                    mime_type = "text/csv"
-                elif conversion_type == "Excel":
-                    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                        df.to_excel(writer, index=False)
-                    file_name = file.name.replace(file_ext, ".xlsx")
-                    mime_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                buffer.seek(0)
-
-                # Download button
-                st.download_button(
-                    label=f"📥 Download {file_name}",
-                    data=buffer,
-                    file_name=file_name,
-                    mime=mime_type
-                )
+                with st.spinner("🔄 Processing..."):
+                    full_df = _load_full(file, file_ext)
+                    if full_df is not None:
+                        df = _select_columns(full_df, columns)
+                        buffer = BytesIO()
+                        if conversion_type == "CSV":
+                            _write_csv(df, buffer)
+                            file_name = meta["csv_name"]
+                            mime_type = "text/csv"
+                        elif conversion_type == "Excel":
+                            _write_excel(df, buffer)
+                            file_name = meta["xlsx_name"]
+                            mime_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                        elif conversion_type == "Parquet":
+                            _write_parquet(df, buffer)
+                            file_name = meta["parquet_name"]
+                            mime_type = "application/vnd.apache.parquet"
+
+                if full_df is not None:
+                    buffer.seek(0)
+
+                    # Download button
+                    st.download_button(
+                        label=f"📥 Download {file_name}",
+                        data=buffer,
+                        file_name=file_name,
+                        mime=mime_type
+                    )
+
+        entry = _working().get(file.file_id)
+        preview_slot.dataframe((entry["df"] if entry else preview_df).head())
 
 # Thank you message with GitHub link
 st.success("🎉 Thank you for using Data Sweeper. Please give us a ⭐ on [GitHub](https://github.com/Palwasha-48) if you liked it.")